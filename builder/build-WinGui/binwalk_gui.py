@@ -12,6 +12,12 @@ import subprocess
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox, scrolledtext
 import threading
+import queue
+
+# 输出批量刷新间隔（毫秒）
+OUTPUT_FLUSH_INTERVAL_MS = 50
+# 输出文本框最多保留的行数
+MAX_OUTPUT_LINES = 5000
 
 
 class BinwalkGUI:
@@ -37,6 +43,9 @@ binwalk图形界面主类
         # 配置binwalk路径 - 支持独立运行模式
         self.binwalk_path = self.get_binwalk_path()
         print(f"[+] 使用的binwalk路径: {self.binwalk_path}")
+        
+        # 启动输出队列的定时刷新
+        self.root.after(OUTPUT_FLUSH_INTERVAL_MS, self._drain_output_queue)
     
     def get_binwalk_path(self):
         """
@@ -139,7 +148,7 @@ binwalk图形界面主类
         output_frame = ttk.LabelFrame(main_frame, text="分析结果", padding="10")
         output_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        self.output_text = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, width=90, height=20)
+        self.output_text = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, width=90, height=20, undo=False, maxundo=0)
         self.output_text.pack(fill=tk.BOTH, expand=True)
         self.output_text.config(state=tk.DISABLED)
         
@@ -150,6 +159,9 @@ binwalk图形界面主类
         
         # 初始化进程变量
         self.process = None
+        
+        # 输出队列，由读取线程写入，主线程批量刷新到文本框
+        self.output_queue = queue.SimpleQueue()
     
     def create_param_options(self, parent_frame):
         """
@@ -330,19 +342,32 @@ binwalk图形界面主类
 参数:
     text: 要添加的文本
         """
-        self.root.after(0, lambda: self._append_output_safe(text))
+        self.output_queue.put(text)
     
-    def _append_output_safe(self, text):
+    def _drain_output_queue(self):
         """
-安全地向输出文本框添加内容（在主线程中执行）
+批量刷新输出队列到文本框（在主线程中定时执行）
 
-参数:
-    text: 要添加的文本
+每个刷新周期只插入一次文本并滚动一次，避免逐行刷新界面
         """
-        self.output_text.config(state=tk.NORMAL)
-        self.output_text.insert(tk.END, text)
-        self.output_text.see(tk.END)
-        self.output_text.config(state=tk.DISABLED)
+        chunks = []
+        while True:
+            try:
+                chunks.append(self.output_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        if chunks:
+            self.output_text.config(state=tk.NORMAL)
+            self.output_text.insert(tk.END, "".join(chunks))
+            # 限制保留的行数，避免长时间输出占用过多内存
+            line_count = int(self.output_text.index("end-1c").split(".")[0])
+            if line_count > MAX_OUTPUT_LINES:
+                self.output_text.delete("1.0", f"{line_count - MAX_OUTPUT_LINES + 1}.0")
+            self.output_text.see(tk.END)
+            self.output_text.config(state=tk.DISABLED)
+        
+        self.root.after(OUTPUT_FLUSH_INTERVAL_MS, self._drain_output_queue)
     
     def stop_binwalk(self):
         """
@@ -360,6 +385,13 @@ binwalk图形界面主类
         """
 清空输出文本框
         """
+        # 丢弃尚未刷新的输出
+        while True:
+            try:
+                self.output_queue.get_nowait()
+            except queue.Empty:
+                break
+        
         self.output_text.config(state=tk.NORMAL)
         self.output_text.delete(1.0, tk.END)
         self.output_text.config(state=tk.DISABLED)
@@ -12,6 +12,7 @@ import sys
 import subprocess
 import time
 import shutil
+import traceback
 import importlib.util
 
 def print_header():
@@ -472,7 +473,6 @@ def main():
         return 1
     except Exception as e:
         print(f"[-] 发生未知错误: {e}")
-        import traceback
         traceback.print_exc()
         return 1
     
@@ -16,7 +16,10 @@ import tarfile
 import stat
 import platform
 import time
+import queue
+import atexit
 import logging
+import logging.handlers
 from urllib.request import urlretrieve
 
 # 确保路径分隔符正确处理
@@ -50,12 +53,30 @@ CARGO_HOME = get_normalized_path(os.path.join(RUST_DIR, 'cargo'))
 RUSTUP_HOME = get_normalized_path(os.path.join(RUST_DIR, 'rustup'))
 PROJECT_ROOT = get_normalized_path(os.path.dirname(sCRIPT_DIR))  # 项目根目录在builder的上一级
 
+# 当前平台在运行期间不会变化，只检测一次
+IS_WINDOWS = platform.system() == 'Windows'
+
 # 配置日志
+# build.log按大小轮转，避免多次构建后日志文件无限增长
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
 os.makedirs(LOCAL_ENV_DIR, exist_ok=True)
+# 日志文件写入交给后台线程，构建主流程不再同步等待磁盘写入
+# 控制台输出保持同步，避免与print输出交错
+LOG_QUEUE = queue.Queue(-1)
+LOG_LISTENER = logging.handlers.QueueListener(
+    LOG_QUEUE,
+    logging.handlers.RotatingFileHandler(os.path.join(LOCAL_ENV_DIR, 'build.log'),
+                                         maxBytes=LOG_MAX_BYTES,
+                                         backupCount=LOG_BACKUP_COUNT,
+                                         encoding='utf-8')
+)
+LOG_LISTENER.start()
+atexit.register(LOG_LISTENER.stop)
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
                     handlers=[
-                        logging.FileHandler(os.path.join(LOCAL_ENV_DIR, 'build.log')),
+                        logging.handlers.QueueHandler(LOG_QUEUE),
                         logging.StreamHandler()
                     ])
 logger = logging.getLogger('binwalk-builder')
@@ -89,7 +110,7 @@ MINGW_URL = "https://github.com/niXman/mingw-builds-binaries/releases/download/1
 MINGW_ARCHIVE = os.path.join(LOCAL_ENV_DIR, 'mingw64.7z')
 
 # Rustup 下载信息
-if platform.system() == 'Windows':
+if IS_WINDOWS:
     RUSTUP_URL = "https://win.rustup.rs/x86_64"
     RUSTUP_EXE = os.path.join(LOCAL_ENV_DIR, 'rustup-init.exe')
 else:
@@ -115,7 +136,7 @@ def run_command(cmd, env=None, cwd=None, capture_output=False):
         clean_env = {}
         if env is None:
             # 创建最基本的环境变量
-            if platform.system() == 'Windows':
+            if IS_WINDOWS:
                 # Windows基本环境变量
                 clean_env['TEMP'] = os.environ.get('TEMP', os.path.join(LOCAL_ENV_DIR, 'temp'))
                 clean_env['TMP'] = os.environ.get('TMP', os.path.join(LOCAL_ENV_DIR, 'temp'))
@@ -140,32 +161,32 @@ def run_command(cmd, env=None, cwd=None, capture_output=False):
                 if cmd[0] == 'rustup' or cmd[0] == 'cargo':
                     # 使用相对路径的Rust工具
                     local_bin = os.path.join(CARGO_HOME, 'bin', cmd[0])
-                    if platform.system() == 'Windows':
+                    if IS_WINDOWS:
                         local_bin += '.exe'
                     # 确保文件存在
                     if os.path.exists(local_bin):
                         cmd[0] = local_bin
-                        logger.info(f"使用相对路径的 {cmd[0]} 工具")
+                        logger.info("使用相对路径的 %s 工具", cmd[0])
                     else:
-                        logger.warning(f"本地工具不存在: {local_bin}")
-                elif (cmd[0] == 'gcc' or cmd[0] == 'g++') and platform.system() == 'Windows':
+                        logger.warning("本地工具不存在: %s", local_bin)
+                elif (cmd[0] == 'gcc' or cmd[0] == 'g++') and IS_WINDOWS:
                     # Windows上使用MinGW工具
                     local_bin = os.path.join(MINGW_DIR, 'bin', cmd[0])
-                    if platform.system() == 'Windows':
+                    if IS_WINDOWS:
                         local_bin += '.exe'
                     if os.path.exists(local_bin):
                         cmd[0] = local_bin
-                        logger.info(f"使用相对路径的 {cmd[0]} 工具")
+                        logger.info("使用相对路径的 %s 工具", cmd[0])
                     else:
-                        logger.warning(f"本地MinGW工具不存在: {local_bin}")
+                        logger.warning("本地MinGW工具不存在: %s", local_bin)
                 elif cmd[0] == '7z' and os.path.exists(SEVEN_ZIP_EXE):
                     # 使用相对路径的7z工具
                     cmd[0] = SEVEN_ZIP_EXE
-                    logger.info(f"使用相对路径的 7z 工具: {SEVEN_ZIP_EXE}")
+                    logger.info("使用相对路径的 7z 工具: %s", SEVEN_ZIP_EXE)
                 else:
-                    logger.warning(f"未配置本地工具路径: {cmd[0]}")
+                    logger.warning("未配置本地工具路径: %s", cmd[0])
             else:
-                logger.warning(f"未处理的命令: {cmd[0]}")
+                logger.warning("未处理的命令: %s", cmd[0])
         
         # 设置环境变量以确保使用正确的工具链
         clean_env['RUSTUP_HOME'] = RUSTUP_HOME
@@ -173,7 +194,7 @@ def run_command(cmd, env=None, cwd=None, capture_output=False):
         clean_env['LOCAL_ENV_DIR'] = LOCAL_ENV_DIR
         
         # Windows特定设置
-        if platform.system() == 'Windows':
+        if IS_WINDOWS:
             # 添加MinGW到环境变量
             if os.path.exists(MINGW_DIR):
                 mingw_bin = os.path.join(MINGW_DIR, 'bin')
@@ -192,15 +213,16 @@ def run_command(cmd, env=None, cwd=None, capture_output=False):
                 os.makedirs(cwd, exist_ok=True)
         
         command_str = ' '.join(cmd)
-        logger.info(f"执行命令: {command_str}")
+        logger.info("执行命令: %s", command_str)
         if cwd:
-            logger.info(f"工作目录: {cwd}")
+            logger.info("工作目录: %s", cwd)
         print(f"执行命令: {command_str}")
         if cwd:
             print(f"工作目录: {cwd}")
         
         # 使用清理后的环境变量，确保不使用系统PATH
-        process = subprocess.Popen(
+        # subprocess.run直接等待进程结束，不捕获输出时不创建管道
+        result = subprocess.run(
             cmd,
             stdout=subprocess.PIPE if capture_output else None,
             stderr=subprocess.PIPE if capture_output else None,
@@ -210,26 +232,24 @@ def run_command(cmd, env=None, cwd=None, capture_output=False):
         )
         
         if capture_output:
-            stdout, stderr = process.communicate()
-            if process.returncode != 0:
-                logger.error(f"命令执行失败: {command_str}")
-                logger.error(f"错误输出: {stderr}")
+            if result.returncode != 0:
+                logger.error("命令执行失败: %s", command_str)
+                logger.error("错误输出: %s", result.stderr)
             else:
-                logger.info(f"命令执行成功: {command_str}")
-            return process.returncode, stdout.strip(), stderr.strip()
+                logger.info("命令执行成功: %s", command_str)
+            return result.returncode, result.stdout.strip(), result.stderr.strip()
         else:
-            process.wait()
-            if process.returncode != 0:
-                logger.error(f"命令执行失败，返回码: {process.returncode}")
+            if result.returncode != 0:
+                logger.error("命令执行失败，返回码: %s", result.returncode)
             else:
-                logger.info(f"命令执行成功: {command_str}")
-            return process.returncode, "", ""
+                logger.info("命令执行成功: %s", command_str)
+            return result.returncode, "", ""
     except Exception as e:
         error_msg = f"执行命令出错: {e}"
         logger.error(error_msg)
-        logger.error(f"命令: {' '.join(cmd)}")
+        logger.error("命令: %s", ' '.join(cmd))
         if cwd:
-            logger.error(f"工作目录: {cwd}")
+            logger.error("工作目录: %s", cwd)
         print(error_msg)
         print(f"命令: {' '.join(cmd)}")
         if cwd:
@@ -251,9 +271,9 @@ def download_file(url, output_path):
     if os.path.exists(output_path):
         try:
             os.remove(output_path)
-            logger.info(f"删除已存在的文件: {output_path}")
+            logger.info("删除已存在的文件: %s", output_path)
         except Exception as e:
-            logger.warning(f"无法删除已存在的文件: {e}")
+            logger.warning("无法删除已存在的文件: %s", e)
     
     def reporthook(count, block_size, total_size):
         if total_size > 0:
@@ -264,7 +284,7 @@ def download_file(url, output_path):
             sys.stdout.flush()
     
     file_name = os.path.basename(output_path)
-    logger.info(f"开始下载 {file_name} 从 {url} 到 {output_path}")
+    logger.info("开始下载 %s 从 %s 到 %s", file_name, url, output_path)
     print(f"下载 {file_name} 从 {url}")
     
     try:
@@ -275,7 +295,7 @@ def download_file(url, output_path):
         speed_mb_s = file_size / elapsed_time if elapsed_time > 0 else 0
         
         print(f"\n下载完成")
-        logger.info(f"下载完成: {file_name}, 大小: {file_size:.2f} MB, 耗时: {elapsed_time:.2f} 秒, 速度: {speed_mb_s:.2f} MB/s")
+        logger.info("下载完成: %s, 大小: %.2f MB, 耗时: %.2f 秒, 速度: %.2f MB/s", file_name, file_size, elapsed_time, speed_mb_s)
     except Exception as e:
         error_msg = f"下载失败: {e}"
         logger.error(error_msg)
@@ -284,7 +304,7 @@ def download_file(url, output_path):
         if os.path.exists(output_path):
             try:
                 os.remove(output_path)
-                logger.info(f"删除下载失败的文件: {output_path}")
+                logger.info("删除下载失败的文件: %s", output_path)
             except:
                 pass
         raise
@@ -302,7 +322,7 @@ def install_seven_zip():
     
     # 检查7z工具是否已存在
     if os.path.exists(SEVEN_ZIP_EXE):
-        logger.info(f"7-Zip工具已存在: {SEVEN_ZIP_EXE}")
+        logger.info("7-Zip工具已存在: %s", SEVEN_ZIP_EXE)
         print(f"7-Zip 已安装在本地环境中: {SEVEN_ZIP_EXE}")
         return True
     
@@ -313,7 +333,7 @@ def install_seven_zip():
     max_attempts = 3
     for attempt in range(1, max_attempts + 1):
         try:
-            logger.info(f"尝试 {attempt}/{max_attempts}: 下载7-Zip便携版")
+            logger.info("尝试 %s/%s: 下载7-Zip便携版", attempt, max_attempts)
             print(f"尝试 {attempt}/{max_attempts}: 下载7-Zip便携版...")
             
             # 使用便携版7zr.exe
@@ -333,28 +353,28 @@ def install_seven_zip():
                     shutil.copy2(SEVEN_ZIP_PORTABLE, SEVEN_ZIP_EXE)
                     # 确保复制成功
                     if os.path.exists(SEVEN_ZIP_EXE):
-                        logger.info(f"7-Zip便携版安装成功: {SEVEN_ZIP_EXE}")
+                        logger.info("7-Zip便携版安装成功: %s", SEVEN_ZIP_EXE)
                         print(f"7-Zip 便携版已成功安装到 {SEVEN_ZIP_DIR}")
                         # 设置可执行权限
-                        if platform.system() != 'Windows':
+                        if not IS_WINDOWS:
                             os.chmod(SEVEN_ZIP_EXE, os.stat(SEVEN_ZIP_EXE).st_mode | stat.S_IEXEC)
                         return True
                 else:
-                    logger.warning(f"7-Zip便携版路径与目标路径相同: {SEVEN_ZIP_PORTABLE}")
+                    logger.warning("7-Zip便携版路径与目标路径相同: %s", SEVEN_ZIP_PORTABLE)
             else:
-                logger.error(f"7-Zip便携版下载失败或文件大小异常: {os.path.getsize(SEVEN_ZIP_PORTABLE) if os.path.exists(SEVEN_ZIP_PORTABLE) else '不存在'}")
+                logger.error("7-Zip便携版下载失败或文件大小异常: %s", os.path.getsize(SEVEN_ZIP_PORTABLE) if os.path.exists(SEVEN_ZIP_PORTABLE) else '不存在')
                 print("7-Zip便携版下载失败或文件大小异常")
                 # 清理下载失败的文件
                 if os.path.exists(SEVEN_ZIP_PORTABLE):
                     os.remove(SEVEN_ZIP_PORTABLE)
         except Exception as e:
-            logger.error(f"安装7-Zip便携版出错: {e}")
+            logger.error("安装7-Zip便携版出错: %s", e)
             print(f"安装7-Zip便携版出错: {e}")
         
         # 如果不是最后一次尝试，等待一会再重试
         if attempt < max_attempts:
             wait_time = 5
-            logger.info(f"等待 {wait_time} 秒后重试...")
+            logger.info("等待 %s 秒后重试...", wait_time)
             time.sleep(wait_time)
     
     # 如果主要方法失败，尝试使用备用URL
@@ -368,11 +388,11 @@ def install_seven_zip():
         
         if os.path.exists(SEVEN_ZIP_ALTERNATE):
             shutil.copy2(SEVEN_ZIP_ALTERNATE, SEVEN_ZIP_EXE)
-            logger.info(f"7-Zip备用版本安装成功: {SEVEN_ZIP_EXE}")
+            logger.info("7-Zip备用版本安装成功: %s", SEVEN_ZIP_EXE)
             print(f"7-Zip 备用版本已成功安装到 {SEVEN_ZIP_DIR}")
             return True
     except Exception as e:
-        logger.error(f"安装7-Zip备用版本出错: {e}")
+        logger.error("安装7-Zip备用版本出错: %s", e)
         print(f"安装7-Zip备用版本出错: {e}")
     
     logger.error("所有7-Zip安装方法都失败了")
@@ -380,13 +400,14 @@ def install_seven_zip():
     return False
 
 
-def extract_7z(archive_path, extract_dir):
+def extract_7z(archive_path, extract_dir, prefer_py7zr=False):
     """
     解压7z文件，强制使用本地7z工具，不依赖系统PATH
     
     参数:
         archive_path (str): 7z文件路径
         extract_dir (str): 解压目录
+        prefer_py7zr (bool): 为True时跳过本地7z工具，直接使用py7zr库解压
     
     返回:
         bool: 解压是否成功
@@ -397,7 +418,9 @@ def extract_7z(archive_path, extract_dir):
     os.makedirs(extract_dir, exist_ok=True)
     
     # 强制使用本地7z工具，不使用系统PATH
-    if os.path.exists(SEVEN_ZIP_EXE):
+    if prefer_py7zr:
+        print("跳过本地7-Zip工具，直接使用py7zr库解压")
+    elif os.path.exists(SEVEN_ZIP_EXE):
         print(f"使用本地7-Zip工具: {SEVEN_ZIP_EXE}")
         
         # 使用相对路径调用本地7z工具
@@ -405,7 +428,7 @@ def extract_7z(archive_path, extract_dir):
         
         # 使用干净的环境变量，确保不使用系统PATH
         clean_env = {}
-        if platform.system() == 'Windows':
+        if IS_WINDOWS:
             clean_env['TEMP'] = os.environ.get('TEMP', os.path.join(LOCAL_ENV_DIR, 'temp'))
             clean_env['TMP'] = os.environ.get('TMP', os.path.join(LOCAL_ENV_DIR, 'temp'))
             # 添加7z所在目录到PATH，确保可以找到相关DLL
@@ -439,7 +462,8 @@ def extract_7z(archive_path, extract_dir):
             return extract_7z(archive_path, extract_dir)
     
     # 如果本地7z工具失败，尝试使用Python的py7zr库作为备选
-    print("本地7-Zip工具失败，尝试使用py7zr库解压...")
+    if not prefer_py7zr:
+        print("本地7-Zip工具失败，尝试使用py7zr库解压...")
     try:
         # 使用相对路径调用Python的pip安装py7zr
         print("使用相对路径安装py7zr库...")
@@ -658,7 +682,7 @@ def install_rust():
     # 确保目标安装目录存在
     os.makedirs(RUST_DIR, exist_ok=True)
     
-    if platform.system() == 'Windows':
+    if IS_WINDOWS:
         # Windows安装 - 使用相对路径调用rustup-init.exe
         rustup_rel_path = os.path.relpath(RUSTUP_EXE, sCRIPT_DIR)
         print(f"准备使用相对路径安装Rust: {rustup_rel_path}")
@@ -763,7 +787,7 @@ def setup_gnu_toolchain():
         new_path.append(cargo_bin)
     
     # 根据操作系统确定目标三元组和添加MinGW
-    if platform.system() == 'Windows':
+    if IS_WINDOWS:
         target_triple = 'x86_64-pc-windows-gnu'
         mingw_bin = os.path.join(MINGW_DIR, 'bin')
         if os.path.exists(mingw_bin):
@@ -781,7 +805,7 @@ def setup_gnu_toolchain():
         new_path.extend(['/usr/local/bin', '/usr/bin', '/bin'])
     
     # 设置PATH
-    path_separator = ';' if platform.system() == 'Windows' else ':'
+    path_separator = ';' if IS_WINDOWS else ':'
     env['PATH'] = path_separator.join(new_path)
     
     print(f"目标三元组: {target_triple}")
@@ -829,7 +853,7 @@ target = "{target_triple}"
 """
         
         # 配置目标特定设置
-        if platform.system() == 'Windows' and target_triple == 'x86_64-pc-windows-gnu':
+        if IS_WINDOWS and target_triple == 'x86_64-pc-windows-gnu':
             # Windows平台且目标为x86_64-pc-windows-gnu时，创建一个包含所有设置的配置块
             mingw_gcc = get_normalized_path(os.path.join(MINGW_DIR, 'bin', 'gcc.exe'))
             # 在配置文件中使用正斜杠，Rust/Cargo能正确处理
@@ -852,7 +876,7 @@ rustflags = [
 linker = "gcc"
 """
             # 如果是Windows但目标不是x86_64-pc-windows-gnu，添加mingw路径
-            if platform.system() == 'Windows':
+            if IS_WINDOWS:
                 mingw_gcc = get_normalized_path(os.path.join(MINGW_DIR, 'bin', 'gcc.exe'))
                 mingw_gcc_config = mingw_gcc.replace('\\', '/')
                 config_content += f"\nrustflags = ['-C', 'linker={mingw_gcc_config}']\n"
@@ -1007,7 +1031,7 @@ def build_project(env):
     
     # 确保cargo存在于本地环境
     cargo_path = os.path.join(CARGO_HOME, 'bin', 'cargo')
-    if platform.system() == 'Windows':
+    if IS_WINDOWS:
         cargo_path += '.exe'
     
     if not os.path.exists(cargo_path):
@@ -1125,7 +1149,7 @@ def main():
     
     # 安装本地MinGW64（仅Windows需要）
     mingw_success = True
-    if platform.system() == 'Windows':
+    if IS_WINDOWS:
         mingw_success = install_mingw()
         if not mingw_success:
             print("⚠️  MinGW64 安装失败，将使用Cargo配置强制指定链接器")
@@ -1190,7 +1214,7 @@ def main():
         if not seven_zip_success:
             print("3. 手动安装py7zr库:")
             print("   - 运行: pip install py7zr")
-        if platform.system() == 'Windows' and not mingw_success:
+        if IS_WINDOWS and not mingw_success:
             print("4. 手动下载并解压MinGW64:")
             print(f"   - 下载链接: {MINGW_URL}")
             print(f"   - 解压到: {os.path.join(LOCAL_ENV_DIR, 'mingw64')}")
@@ -1210,6 +1234,6 @@ if __name__ == "__main__":
         print("\n\n构建被用户中断")
     finally:
         # 在Windows上，让命令窗口保持打开状态
-        if platform.system() == 'Windows':
+        if IS_WINDOWS:
             print("\n按Enter键退出...")
             input()
\ No newline at end of file
@@ -6,9 +6,11 @@
 此脚本用于测试build.py中的7z解压功能，验证本地7z工具的安装和使用。
 """
 
+import io
 import os
 import sys
-import shutil
+import json
+import hashlib
 import tempfile
 import subprocess
 
@@ -33,31 +35,72 @@ except ImportError as e:
     print("请确保此脚本位于builder目录中，并且build.py文件存在")
     sys.exit(1)
 
+# 7-Zip可用性探测结果缓存文件，以可执行文件的路径、修改时间和大小为键
+PROBE_CACHE_FILE = os.path.join(LOCAL_ENV_DIR, '.7z_probe.json')
+
+def get_probe_key(exe_path):
+    """
+    根据可执行文件的路径、修改时间和大小生成探测缓存键
+    """
+    st = os.stat(exe_path)
+    return f"{exe_path}|{st.st_mtime_ns}|{st.st_size}"
+
+def load_probe_result(key):
+    """
+    读取缓存的探测结果，缓存不存在或键不匹配时返回None
+    """
+    try:
+        with open(PROBE_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+
+def save_probe_result(key, result):
+    """
+    保存探测结果到缓存文件
+    """
+    try:
+        with open(PROBE_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({key: result}, f)
+    except OSError as e:
+        print(f"⚠️  无法写入7-Zip探测缓存: {e}")
+
+def fast_rmtree(path):
+    """
+    删除测试产生的浅层临时目录，利用os.scandir缓存的文件类型避免额外的stat调用
+    """
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                fast_rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(path)
+
 def create_test_archive():
     """
     创建一个测试用的7z文件（使用Python库）
+    
+    归档内容在内存中生成，只在最后写入一个临时文件供extract_7z使用
     """
     try:
         import py7zr
         
-        # 创建临时目录
-        temp_dir = tempfile.mkdtemp()
-        test_file_path = os.path.join(temp_dir, 'test_file.txt')
-        
-        # 创建测试文件
-        with open(test_file_path, 'w', encoding='utf-8') as f:
-            f.write("This is a test file for 7z extraction.")
+        # 在内存中创建7z归档
+        buf = io.BytesIO()
+        with py7zr.SevenZipFile(buf, 'w') as z:
+            z.writestr("This is a test file for 7z extraction.", 'test_file.txt')
         
-        # 创建7z归档文件
-        archive_path = os.path.join(temp_dir, 'test_archive.7z')
-        with py7zr.SevenZipFile(archive_path, 'w') as z:
-            z.write(test_file_path, 'test_file.txt')
+        # 写入临时文件，由调用者负责删除
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.7z') as f:
+            f.write(buf.getvalue())
+            archive_path = f.name
         
         print(f"创建测试归档文件: {archive_path}")
-        return archive_path, temp_dir
+        return archive_path
     except Exception as e:
         print(f"创建测试归档失败: {e}")
-        return None, None
+        return None
 
 def test_local_seven_zip_installation():
     """
@@ -73,12 +116,18 @@ def test_local_seven_zip_installation():
         # 验证文件存在
         if os.path.exists(SEVEN_ZIP_EXE):
             print(f"✅ 7z.exe文件存在: {SEVEN_ZIP_EXE}")
+            # 同一个7z.exe已验证过时直接使用缓存结果，不再启动进程
+            probe_key = get_probe_key(SEVEN_ZIP_EXE)
+            if load_probe_result(probe_key):
+                print("✅ 7-Zip工具可以正常运行（使用缓存的探测结果）")
+                return True
             # 尝试运行版本命令
             try:
                 result = subprocess.run([SEVEN_ZIP_EXE, '--help'], 
                                       capture_output=True, text=True)
                 if "7-Zip" in result.stdout:
                     print("✅ 7-Zip工具可以正常运行")
+                    save_probe_result(probe_key, True)
                     return True
                 else:
                     print("❌ 7-Zip工具运行异常")
@@ -128,7 +177,7 @@ def test_extraction_with_local_7z(archive_path):
     finally:
         # 清理临时目录
         if os.path.exists(extract_dir):
-            shutil.rmtree(extract_dir)
+            fast_rmtree(extract_dir)
     
     return False
 
@@ -142,46 +191,44 @@ def test_extraction_with_py7zr(archive_path):
     extract_dir = tempfile.mkdtemp()
     
     try:
-        # 强制使用py7zr库（临时重命名SEVEN_ZIP_EXE以模拟失败）
-        original_seven_zip_exe = SEVEN_ZIP_EXE
-        temp_rename = SEVEN_ZIP_EXE + '.tmp'
+        # 使用build.py中的extract_7z函数，强制使用py7zr库
+        success = extract_7z(archive_path, extract_dir, prefer_py7zr=True)
         
-        if os.path.exists(SEVEN_ZIP_EXE):
-            os.rename(SEVEN_ZIP_EXE, temp_rename)
-            
-        try:
-            # 使用build.py中的extract_7z函数
-            success = extract_7z(archive_path, extract_dir)
-            
-            if success:
-                # 验证解压结果
-                test_file = os.path.join(extract_dir, 'test_file.txt')
-                if os.path.exists(test_file):
-                    with open(test_file, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    if "This is a test file for 7z extraction." in content:
-                        print("✅ 使用py7zr库解压成功（备选方法工作正常）")
-                        return True
-                    else:
-                        print("❌ 解压的文件内容不正确")
+        if success:
+            # 验证解压结果
+            test_file = os.path.join(extract_dir, 'test_file.txt')
+            if os.path.exists(test_file):
+                with open(test_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                if "This is a test file for 7z extraction." in content:
+                    print("✅ 使用py7zr库解压成功（备选方法工作正常）")
+                    return True
                 else:
-                    print(f"❌ 解压的文件不存在: {test_file}")
+                    print("❌ 解压的文件内容不正确")
             else:
-                print("❌ 使用py7zr库解压失败")
-        finally:
-            # 恢复7z.exe文件名
-            if os.path.exists(temp_rename):
-                os.rename(temp_rename, original_seven_zip_exe)
-                
+                print(f"❌ 解压的文件不存在: {test_file}")
+        else:
+            print("❌ 使用py7zr库解压失败")
+    
     except Exception as e:
         print(f"❌ 解压过程出错: {e}")
     finally:
         # 清理临时目录
         if os.path.exists(extract_dir):
-            shutil.rmtree(extract_dir)
+            fast_rmtree(extract_dir)
     
     return False
 
+def file_sha256(path):
+    """
+    分块计算文件的SHA256摘要
+    """
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
 def download_sample_7z():
     """
     下载一个示例7z文件进行测试
@@ -194,10 +241,28 @@ def download_sample_7z():
     # 实际测试中，我们可以使用创建的测试归档
     
     sample_path = os.path.join(LOCAL_ENV_DIR, 'sample_archive.zip')
+    checksum_path = sample_path + '.sha256'
+    
+    # 已下载且校验和一致时直接使用缓存的文件
+    if os.path.exists(sample_path) and os.path.getsize(sample_path) > 0 and os.path.exists(checksum_path):
+        try:
+            with open(checksum_path, 'r', encoding='utf-8') as f:
+                expected = f.read().strip()
+            if expected and expected == file_sha256(sample_path):
+                print(f"✅ 使用已缓存的示例文件: {sample_path}")
+                return sample_path
+        except OSError as e:
+            print(f"⚠️  无法校验已缓存的示例文件: {e}")
     
     try:
         download_file(sample_url, sample_path)
         print(f"✅ 示例文件下载成功: {sample_path}")
+        # 记录校验和，供下次运行时跳过下载
+        try:
+            with open(checksum_path, 'w', encoding='utf-8') as f:
+                f.write(file_sha256(sample_path))
+        except OSError as e:
+            print(f"⚠️  无法写入示例文件校验和: {e}")
         return sample_path
     except Exception as e:
         print(f"❌ 示例文件下载失败: {e}")
@@ -222,7 +287,7 @@ def main():
     
     # 创建测试归档
     print("\n=== 创建测试归档文件 ===")
-    test_archive, temp_dir = create_test_archive()
+    test_archive = create_test_archive()
     
     if not test_archive:
         print("❌ 无法创建测试归档，测试中止")
@@ -257,9 +322,9 @@ def main():
             
     finally:
         # 清理临时文件
-        if temp_dir and os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-            print(f"\n清理临时目录: {temp_dir}")
+        if os.path.exists(test_archive):
+            os.remove(test_archive)
+            print(f"\n清理测试归档文件: {test_archive}")
 
 if __name__ == "__main__":
     try:
@@ -10,11 +10,72 @@ Binwalk 构建清理脚本
 import os
 import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# 要保留的文件类型和目录
+KEEP_EXTENSIONS = frozenset({'.exe', '.dll', '.pdb'})  # .pdb是调试符号文件，可选保留
+KEEP_DIRECTORIES = frozenset({'sqfs_for_win'})
+
+# 要删除的中间文件目录
+DELETE_DIRS = ('build', 'deps', 'examples', 'incremental', 'native')
+
+# 要删除的文件类型
+DELETE_EXTENSIONS = frozenset({'.rlib', '.rmeta', '.rs', '.d', '.o', '.exp', '.lib'})
+
+# 并行删除目录时的最大线程数
+MAX_RMTREE_WORKERS = 8
 
 def get_normalized_path(path):
     """获取规范化的路径"""
     return os.path.normpath(path)
 
+def remove_dirs(dir_paths, messages, label):
+    """
+    使用线程池并行删除多个目录
+    
+    参数:
+        dir_paths: 要删除的目录路径列表
+        messages: 日志缓存列表，按dir_paths的顺序追加每个目录的删除结果
+        label: 删除成功时日志行的前缀
+    
+    返回值:
+        tuple: (成功删除的目录数, 删除失败的目录数)
+    """
+    if not dir_paths:
+        return 0, 0
+    
+    def remove_dir(dir_path):
+        try:
+            shutil.rmtree(dir_path)
+            return None
+        except Exception as e:
+            return e
+    
+    removed = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=min(MAX_RMTREE_WORKERS, len(dir_paths))) as executor:
+        # map按输入顺序返回结果，日志顺序与扫描顺序一致
+        for dir_path, error in zip(dir_paths, executor.map(remove_dir, dir_paths)):
+            if error is None:
+                messages.append(f"{label}: {dir_path}")
+                removed += 1
+            else:
+                messages.append(f"删除目录失败: {dir_path}, 错误: {error}")
+                failed += 1
+    return removed, failed
+
+def flush_messages(messages):
+    """
+    一次性输出缓存的逐项日志，避免逐行写入控制台
+    
+    参数:
+        messages: 缓存的日志行列表，输出后清空
+    """
+    if messages:
+        sys.stdout.write("\n".join(messages) + "\n")
+        sys.stdout.flush()
+        messages.clear()
+
 def main():
     # 获取脚本所在目录
     script_dir = get_normalized_path(os.path.dirname(os.path.abspath(__file__)))
@@ -27,62 +88,75 @@ def main():
         print(f"错误: 目标目录不存在: {target_dir}")
         sys.exit(1)
     
-    # 要保留的文件类型和目录
-    keep_extensions = ['.exe', '.dll', '.pdb']  # .pdb是调试符号文件，可选保留
-    keep_directories = ['sqfs_for_win']
-    
-    # 要删除的中间文件目录
-    delete_dirs = ['build', 'deps', 'examples', 'incremental', 'native']
-    
-    # 要删除的文件类型
-    delete_extensions = ['.rlib', '.rmeta', '.rs', '.d', '.o', '.exp', '.lib']
-    
     files_cleaned = 0
     dirs_cleaned = 0
+    dirs_failed = 0
+    # 逐项日志先缓存，扫描结束后统一输出
+    messages = []
     
     try:
         # 删除已知的中间文件目录
-        for dir_name in delete_dirs:
+        intermediate_dirs = []
+        for dir_name in DELETE_DIRS:
             dir_path = os.path.join(target_dir, dir_name)
-            if os.path.exists(dir_path) and os.path.isdir(dir_path):
-                print(f"删除中间目录: {dir_path}")
-                shutil.rmtree(dir_path)
-                dirs_cleaned += 1
+            if os.path.isdir(dir_path):
+                intermediate_dirs.append(dir_path)
+        removed, failed = remove_dirs(intermediate_dirs, messages, "删除中间目录")
+        dirs_cleaned += removed
+        dirs_failed += failed
         
         # 遍历target目录下的所有文件和目录
-        for item in os.listdir(target_dir):
-            item_path = os.path.join(target_dir, item)
+        # 使用scandir获取目录项类型，避免对每个条目重复stat
+        with os.scandir(target_dir) as it:
+            entries = list(it)
+        
+        unwanted_dirs = []
+        for entry in entries:
+            # 已尝试删除的中间目录（删除失败时仍存在）不再重复处理
+            if entry.path in intermediate_dirs:
+                continue
             
             # 检查是否为需要保留的目录
-            if os.path.isdir(item_path):
-                if item not in keep_directories:
-                    print(f"删除不需要的目录: {item_path}")
-                    shutil.rmtree(item_path)
-                    dirs_cleaned += 1
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in KEEP_DIRECTORIES:
+                    unwanted_dirs.append(entry.path)
                 else:
-                    print(f"保留目录: {item_path}")
+                    messages.append(f"保留目录: {entry.path}")
             
             # 检查是否为需要保留的文件
-            elif os.path.isfile(item_path):
+            elif entry.is_file(follow_symlinks=False):
                 # 获取文件扩展名
-                _, ext = os.path.splitext(item.lower())
+                ext = os.path.splitext(entry.name)[1].lower()
                 
                 # 如果扩展名不在保留列表中，则删除
-                if ext not in keep_extensions:
+                if ext not in KEEP_EXTENSIONS:
                     # 检查是否为要删除的扩展名
-                    if ext in delete_extensions or not ext:  # 也删除没有扩展名的临时文件
-                        print(f"删除中间文件: {item_path}")
-                        os.remove(item_path)
+                    if ext in DELETE_EXTENSIONS or not ext:  # 也删除没有扩展名的临时文件
+                        messages.append(f"删除中间文件: {entry.path}")
+                        os.remove(entry.path)
                         files_cleaned += 1
                 else:
-                    print(f"保留文件: {item_path}")
+                    messages.append(f"保留文件: {entry.path}")
+        
+        removed, failed = remove_dirs(unwanted_dirs, messages, "删除不需要的目录")
+        dirs_cleaned += removed
+        dirs_failed += failed
+        flush_messages(messages)
         
         print(f"\n清理完成!")
         print(f"- 删除的中间文件: {files_cleaned}")
         print(f"- 删除的中间目录: {dirs_cleaned}")
+        if dirs_failed:
+            print(f"- 删除失败的目录: {dirs_failed}")
         print(f"\n发布目录已准备就绪: {target_dir}")
         
+        # 部分目录删除失败时清理不完整，以非零状态码退出
+        if dirs_failed:
+            print(f"警告: 有 {dirs_failed} 个目录删除失败，清理不完整")
+            sys.exit(1)
+        
     except Exception as e:
+        flush_messages(messages)
         print(f"清理过程中出错: {e}")
         sys.exit(1)
 